@@ -1,10 +1,14 @@
 # 本程序由空游开发
 # Copyright (c) 2025 空游
 # SPDX-License-Identifier: MIT
+import json
+import os
 import time
+import operator
+import re
 import threading
 import concurrent.futures
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Iterator
 from urllib.parse import urlparse
 import urllib.robotparser as robotparser
 from datetime import datetime
@@ -16,6 +20,8 @@ try:
 except Exception:
     Retry = None
 
+from trading_session import TradingCalendar, defaultCacheDir, getDefaultCalendar, writeJsonAtomic
+
 
 class SessionFactory:
     def __init__(self, totalRetries: int = 3, backoffFactor: float = 0.3) -> None:
@@ -82,15 +88,17 @@ class RobotsChecker:
 
 
 class RateLimiter:
-    def __init__(self, robotsChecker: RobotsChecker, defaultMinIntervalMs: int = 10) -> None:
+    def __init__(self, robotsChecker: RobotsChecker, defaultMinIntervalMs: int = 10, shareCount: int = 1) -> None:
         self.defaultMinIntervalMs = defaultMinIntervalMs
+        # 多进程分片时每个进程只占 1/shareCount 的站点配额，间隔相应放大
+        self.shareCount = max(1, shareCount)
         self.robotsChecker = robotsChecker
         self.lastTimes: Dict[str, float] = {}
         self.lock = threading.Lock()
 
     def sleepIfNeeded(self, url: str) -> None:
         domain = urlparse(url).netloc
-        intervalMs = self.robotsChecker.crawlDelayMs(url, defaultMs=self.defaultMinIntervalMs)
+        intervalMs = self.robotsChecker.crawlDelayMs(url, defaultMs=self.defaultMinIntervalMs) * self.shareCount
         with self.lock:
             now = time.time()
             last = self.lastTimes.get(domain, 0.0)
@@ -134,6 +142,25 @@ class CircuitBreaker:
             self.openedAt = time.time()
 
 
+# Akshare 全市场快照列名 -> 统一英文字段名
+SNAPSHOT_COLUMNS: Dict[str, str] = {
+    "代码": "stockCode",
+    "名称": "stockName",
+    "今开": "openPrice",
+    "最新价": "closePrice",
+    "最高": "highPrice",
+    "最低": "lowPrice",
+    "成交量": "volume",
+    "成交额": "amount",
+    "涨跌幅": "changePct",
+    "换手率": "turnoverRate",
+    "昨收": "prevClose",
+}
+
+
+SNAPSHOT_CACHE_KEY = "__snapshot__"
+
+
 class SourceBase:
     def __init__(self, robotsChecker: RobotsChecker, rateLimiter: RateLimiter, sessionFactory: SessionFactory) -> None:
         self.robotsChecker = robotsChecker
@@ -143,6 +170,28 @@ class SourceBase:
     def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
         raise NotImplementedError
 
+    def fetchQuotes(self, stockCodes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取行情；默认逐只查询，支持批量接口的数据源应覆盖此方法。
+
+        开头连续 failFastCount 只全部失败（或整批失败）时抛出最后一个异常，
+        交由调用方的熔断器记录，避免数据源宕机时逐只耗尽超时。
+        """
+        failFastCount = 3
+        results: Dict[str, Dict[str, Any]] = {}
+        lastError: Optional[Exception] = None
+        failures = 0
+        for stockCode in stockCodes:
+            try:
+                results[stockCode] = self.fetchQuote(stockCode)
+            except Exception as e:
+                lastError = e
+                failures += 1
+                if not results and failures >= failFastCount:
+                    raise
+        if not results and lastError is not None:
+            raise lastError
+        return results
+
 
 class AkshareSource(SourceBase):
     def __init__(self, robotsChecker: RobotsChecker, rateLimiter: RateLimiter, sessionFactory: SessionFactory) -> None:
@@ -154,22 +203,48 @@ class AkshareSource(SourceBase):
             self.ak = None
             raise RuntimeError("Akshare 不可用：模块未安装或导入失败")
 
-    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
+    def fetchSnapshot(self):
+        """拉取全市场 A 股快照，并统一为与 fetchQuote 相同的英文列名。"""
+        import pandas as pd  # akshare 的依赖，随其一起延迟导入
         spotDf = self.ak.stock_zh_a_spot_em()
         if spotDf is None or spotDf.empty:
             raise RuntimeError("Akshare 返回空数据")
-        spotDf["代码"] = spotDf["代码"].astype(str).str.zfill(6)
-        targetDf = spotDf[spotDf["代码"] == stockCode]
+        spotDf = spotDf.rename(columns=SNAPSHOT_COLUMNS)
+        if "volume" not in spotDf.columns and "成交量(手)" in spotDf.columns:
+            spotDf = spotDf.rename(columns={"成交量(手)": "volume"})
+        spotDf["stockCode"] = spotDf["stockCode"].astype(str).str.zfill(6)
+        stockNames = spotDf["stockName"].fillna("").astype(str).str.strip()
+        spotDf["stockName"] = stockNames.where(stockNames != "", "未知名称")
+        for column in SNAPSHOT_COLUMNS.values():
+            if column in ("stockCode", "stockName"):
+                continue
+            if column not in spotDf.columns:
+                spotDf[column] = 0.0
+            spotDf[column] = pd.to_numeric(spotDf[column], errors="coerce").fillna(0.0)
+        # 逐行回退：最新价缺失（停牌等）时依次使用收盘价、昨收
+        if "收盘" in spotDf.columns:
+            closeFallback = pd.to_numeric(spotDf["收盘"], errors="coerce").fillna(0.0)
+            spotDf["closePrice"] = spotDf["closePrice"].where(spotDf["closePrice"] != 0, closeFallback)
+        spotDf["closePrice"] = spotDf["closePrice"].where(spotDf["closePrice"] != 0, spotDf["prevClose"])
+        spotDf["volume"] = spotDf["volume"].astype("int64")
+        # 与 MultiSourceClient._sanitizeQuote 一致的高/低位校正（向量化）
+        spotDf["highPrice"] = spotDf[["highPrice", "openPrice", "closePrice"]].max(axis=1)
+        spotDf["lowPrice"] = spotDf[["lowPrice", "openPrice", "closePrice"]].min(axis=1)
+        return spotDf[list(SNAPSHOT_COLUMNS.values())].reset_index(drop=True)
+
+    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
+        spotDf = self.fetchSnapshot()
+        targetDf = spotDf[spotDf["stockCode"] == stockCode]
         if targetDf.empty:
             raise RuntimeError("Akshare 未找到目标代码")
         row = targetDf.iloc[0].to_dict()
         return {
-            "stockName": row.get("名称") or "未知名称",
-            "openPrice": float(row.get("今开") or 0),
-            "closePrice": float((row.get("最新价") or row.get("收盘") or 0) or 0),
-            "highPrice": float(row.get("最高") or 0),
-            "lowPrice": float(row.get("最低") or 0),
-            "volume": int(float(row.get("成交量") or row.get("成交量(手)") or 0)),
+            "stockName": row["stockName"],
+            "openPrice": float(row["openPrice"]),
+            "closePrice": float(row["closePrice"]),
+            "highPrice": float(row["highPrice"]),
+            "lowPrice": float(row["lowPrice"]),
+            "volume": int(row["volume"]),
         }
 
 
@@ -184,18 +259,41 @@ class SinaSource(SourceBase):
     def mapCode(self, stockCode: str) -> str:
         return f"sh{stockCode}" if stockCode.startswith("6") else f"sz{stockCode}"
 
-    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
-        mapped = self.mapCode(stockCode)
-        url = f"http://hq.sinajs.cn/list={mapped}"
+    def _request(self, mappedCodes: List[str]) -> str:
+        url = f"http://hq.sinajs.cn/list={','.join(mappedCodes)}"
         if not self.robotsChecker.canFetch(url):
             raise RuntimeError("Sina robots 不允许抓取该路径")
         self.rateLimiter.sleepIfNeeded(url)
         resp = self.session.get(url, timeout=(5, 10))
         resp.raise_for_status()
-        text = resp.text
+        return resp.text
+
+    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
+        text = self._request([self.mapCode(stockCode)])
         if "hq_str_" not in text or "\"" not in text:
             raise RuntimeError("Sina 返回格式异常")
-        payload = text.split("\"")[1]
+        return self._parsePayload(text.split("\"")[1])
+
+    def fetchQuotes(self, stockCodes: List[str]) -> Dict[str, Dict[str, Any]]:
+        # 批量接口：一次请求返回多行 var hq_str_sh600519="...";
+        codeByMapped = {self.mapCode(code): code for code in stockCodes}
+        text = self._request(list(codeByMapped))
+        results: Dict[str, Dict[str, Any]] = {}
+        for line in text.splitlines():
+            if "hq_str_" not in line or "=\"" not in line:
+                continue
+            mapped = line.split("hq_str_")[1].split("=")[0]
+            payload = line.split("\"")[1]
+            code = codeByMapped.get(mapped)
+            if code is None or not payload:
+                continue
+            try:
+                results[code] = self._parsePayload(payload)
+            except (ValueError, IndexError):
+                continue
+        return results
+
+    def _parsePayload(self, payload: str) -> Dict[str, Any]:
         parts = payload.split(",")
         stockName = parts[0]
         openPrice = float(parts[1]) if parts[1] else 0.0
@@ -226,18 +324,42 @@ class TencentSource(SourceBase):
     def mapCode(self, stockCode: str) -> str:
         return f"sh{stockCode}" if stockCode.startswith("6") else f"sz{stockCode}"
 
-    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
-        mapped = self.mapCode(stockCode)
-        url = f"http://qt.gtimg.cn/q={mapped}"
+    def _request(self, mappedCodes: List[str]) -> str:
+        url = f"http://qt.gtimg.cn/q={','.join(mappedCodes)}"
         if not self.robotsChecker.canFetch(url):
             raise RuntimeError("Tencent robots 不允许抓取该路径")
         self.rateLimiter.sleepIfNeeded(url)
         resp = self.session.get(url, timeout=(5, 10))
         resp.raise_for_status()
-        text = resp.text
+        return resp.text
+
+    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
+        text = self._request([self.mapCode(stockCode)])
         if "=\"" not in text:
             raise RuntimeError("Tencent 返回格式异常")
-        payload = text.split("=\"")[1].split("\";")[0]
+        return self._parsePayload(text.split("=\"")[1].split("\";")[0])
+
+    def fetchQuotes(self, stockCodes: List[str]) -> Dict[str, Dict[str, Any]]:
+        # 批量接口：一次请求返回多段 v_sh600519="...";
+        codeByMapped = {self.mapCode(code): code for code in stockCodes}
+        text = self._request(list(codeByMapped))
+        results: Dict[str, Dict[str, Any]] = {}
+        for segment in text.split(";"):
+            if "v_" not in segment or "=\"" not in segment:
+                continue
+            head, payload = segment.split("=\"", 1)
+            mapped = head.strip().split("v_")[-1]
+            payload = payload.rstrip("\"")
+            code = codeByMapped.get(mapped)
+            if code is None or not payload:
+                continue
+            try:
+                results[code] = self._parsePayload(payload)
+            except (ValueError, IndexError):
+                continue
+        return results
+
+    def _parsePayload(self, payload: str) -> Dict[str, Any]:
         parts = payload.split("~")
         stockName = parts[1] if len(parts) > 1 else "未知名称"
         currentPrice = float(parts[3]) if len(parts) > 3 and parts[3] else 0.0
@@ -298,11 +420,24 @@ class EastMoneySource(SourceBase):
 
 
 class MultiSourceClient:
-    def __init__(self, primaryTimeoutSec: int = 60, maxRetries: int = 3, defaultMinIntervalMs: int = 10) -> None:
+    def __init__(self, primaryTimeoutSec: int = 60, maxRetries: int = 3, defaultMinIntervalMs: int = 10,
+                 rateLimitShare: int = 1, includeAkshare: bool = True, cacheTtlSec: float = 3.0,
+                 calendar: Optional[TradingCalendar] = None, persistPath: Optional[str] = None) -> None:
         self.primaryTimeoutSec = primaryTimeoutSec
         self.maxRetries = maxRetries
+        self.includeAkshare = includeAkshare
+        # 行情缓存：盘中按 cacheTtlSec 过期，休市期间有效至下次开盘
+        self.cacheTtlSec = cacheTtlSec
+        self._calendar = calendar
+        self.quoteCache: Dict[str, Tuple[Any, float]] = {}
+        self.cacheLock = threading.Lock()
+        # 休市期间已定格的行情同时落盘，供后续进程（如单次 CLI 查询）直接复用
+        self.persistPath = persistPath
+        self.settledQuotes: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._loadPersisted()
         self.robotsChecker = RobotsChecker()
-        self.rateLimiter = RateLimiter(robotsChecker=self.robotsChecker, defaultMinIntervalMs=defaultMinIntervalMs)
+        self.rateLimiter = RateLimiter(robotsChecker=self.robotsChecker, defaultMinIntervalMs=defaultMinIntervalMs,
+                                       shareCount=rateLimitShare)
         self.sessionFactory = SessionFactory(totalRetries=3, backoffFactor=0.3)
         self.sources: List[Tuple[str, SourceBase]] = []
         self.breakers: Dict[str, CircuitBreaker] = {}
@@ -314,10 +449,11 @@ class MultiSourceClient:
 
     def _buildSources(self) -> None:
         # 主数据源：Akshare
-        try:
-            self._addSource("akshare", AkshareSource(self.robotsChecker, self.rateLimiter, self.sessionFactory))
-        except Exception:
-            pass
+        if self.includeAkshare:
+            try:
+                self._addSource("akshare", AkshareSource(self.robotsChecker, self.rateLimiter, self.sessionFactory))
+            except Exception:
+                pass
         # 备用数据源：Sina -> Tencent -> EastMoney（作为第三备用源）
         self._addSource("sina", SinaSource(self.robotsChecker, self.rateLimiter, self.sessionFactory))
         self._addSource("tencent", TencentSource(self.robotsChecker, self.rateLimiter, self.sessionFactory))
@@ -364,7 +500,94 @@ class MultiSourceClient:
         sanitized["fetchedAt"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         return sanitized
 
-    def fetchQuote(self, stockCode: str) -> Dict[str, Any]:
+    @property
+    def calendar(self) -> TradingCalendar:
+        if self._calendar is None:
+            self._calendar = getDefaultCalendar()
+        return self._calendar
+
+    def _cacheGet(self, key: str) -> Optional[Any]:
+        with self.cacheLock:
+            entry = self.quoteCache.get(key)
+            if entry is None:
+                return None
+            value, expiresAt = entry
+            if time.time() >= expiresAt:
+                del self.quoteCache[key]
+                return None
+            return value
+
+    def _cachePut(self, key: str, value: Any, persist: bool = True) -> bool:
+        """写入缓存，返回该条目是否为休市定格行情（有效至下次开盘）。"""
+        fetchedAt = time.time()
+        validUntil = self.calendar.quoteValidUntil(datetime.fromtimestamp(fetchedAt).astimezone())
+        expiresAt = validUntil.timestamp() if validUntil is not None else fetchedAt + self.cacheTtlSec
+        with self.cacheLock:
+            self.quoteCache[key] = (value, expiresAt)
+            if validUntil is not None and key != SNAPSHOT_CACHE_KEY:
+                self.settledQuotes[key] = (value, expiresAt)
+        if persist and validUntil is not None:
+            self._persist()
+        return validUntil is not None
+
+    def _readPersisted(self) -> Dict[str, Tuple[Dict[str, Any], float]]:
+        try:
+            with open(self.persistPath, "r", encoding="utf-8") as cacheFile:
+                payload = json.load(cacheFile)
+            now = time.time()
+            return {code: (entry["quote"], float(entry["expiresAt"]))
+                    for code, entry in payload["quotes"].items() if float(entry["expiresAt"]) > now}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+    def _loadPersisted(self) -> None:
+        if not self.persistPath:
+            return
+        self.settledQuotes = self._readPersisted()
+        self.quoteCache.update(self.settledQuotes)
+
+    def _persist(self) -> None:
+        if not self.persistPath:
+            return
+        with self.cacheLock:
+            # 合并其他进程已写入的条目，再剔除过期项
+            merged = self._readPersisted()
+            merged.update(self.settledQuotes)
+            now = time.time()
+            self.settledQuotes = {code: entry for code, entry in merged.items() if entry[1] > now}
+            payload = {"quotes": {code: {"quote": quote, "expiresAt": expiresAt}
+                                  for code, (quote, expiresAt) in self.settledQuotes.items()}}
+            try:
+                writeJsonAtomic(self.persistPath, payload)
+            except OSError:
+                pass
+
+    def cachedQuotes(self, stockCodes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """返回仍在有效期内的缓存行情（副本）。"""
+        results: Dict[str, Dict[str, Any]] = {}
+        for stockCode in stockCodes:
+            cached = self._cacheGet(stockCode)
+            if cached is not None:
+                results[stockCode] = dict(cached)
+        return results
+
+    def storeQuotes(self, quotes: Dict[str, Dict[str, Any]]) -> None:
+        """写入行情缓存，有效期按当前交易时段计算。"""
+        settled = [self._cachePut(stockCode, dict(quote), persist=False) for stockCode, quote in quotes.items()]
+        if any(settled):
+            self._persist()
+
+    def fetchQuote(self, stockCode: str, useCache: bool = True) -> Dict[str, Any]:
+        if not useCache:
+            return self._fetchQuoteUncached(stockCode)
+        cached = self._cacheGet(stockCode)
+        if cached is not None:
+            return dict(cached)
+        quote = self._fetchQuoteUncached(stockCode)
+        self._cachePut(stockCode, quote)
+        return dict(quote)
+
+    def _fetchQuoteUncached(self, stockCode: str) -> Dict[str, Any]:
         if not self.sources:
             raise RuntimeError("无可用数据源")
         # 如果首源是 Akshare，使用超时控制
@@ -379,12 +602,97 @@ class MultiSourceClient:
                 except concurrent.futures.TimeoutError:
                     pass
         # 尝试备用源
-        for tag, source in self.sources[1:]:
+        for tag, source in self.sources:
+            if tag == "akshare":
+                continue
             result = self._trySource(tag, source, stockCode)
             if result:
                 return self._annotate(result, tag)
         raise RuntimeError("所有数据源均不可用，请稍后重试")
 
+    def _trySourceBatch(self, tag: str, source: SourceBase, stockCodes: List[str]) -> Dict[str, Dict[str, Any]]:
+        br = self.breakers.get(tag)
+        if br and br.isOpen():
+            return {}
+        for attemptIndex in range(self.maxRetries):
+            try:
+                results = source.fetchQuotes(stockCodes)
+            except Exception:
+                if br:
+                    br.onFailure()
+                time.sleep(0.2 * (attemptIndex + 1))
+                continue
+            # 整批无一返回视为该源失败（通常为限流或接口异常），不再重试
+            if br:
+                if results:
+                    br.onSuccess()
+                else:
+                    br.onFailure()
+            return results
+        return {}
+
+    def fetchQuotes(self, stockCodes: List[str], batchSize: int = 100,
+                    useCache: bool = True) -> Dict[str, Dict[str, Any]]:
+        """按批量接口获取多只股票行情，缺失的代码依次交给下一个数据源。
+
+        Akshare 一次返回全市场，批量场景请使用 fetchSnapshot，此处跳过。
+        """
+        if batchSize < 1:
+            raise ValueError("batchSize 必须为正整数")
+        pending = list(dict.fromkeys(stockCodes))
+        cached = self.cachedQuotes(pending) if useCache else {}
+        pending = [code for code in pending if code not in cached]
+        fetched: Dict[str, Dict[str, Any]] = {}
+        for tag, source in self.sources:
+            if tag == "akshare" or not pending:
+                continue
+            for startIndex in range(0, len(pending), batchSize):
+                chunk = pending[startIndex:startIndex + batchSize]
+                for code, data in self._trySourceBatch(tag, source, chunk).items():
+                    fetched[code] = self._annotate(data, tag)
+            pending = [code for code in pending if code not in fetched]
+        if useCache:
+            self.storeQuotes(fetched)
+        cached.update(fetched)
+        return cached
+
+    def fetchSnapshot(self):
+        """通过 Akshare 一次性拉取全市场快照，供筛选器做向量化计算。"""
+        cached = self._cacheGet(SNAPSHOT_CACHE_KEY)
+        if cached is not None:
+            return cached.copy()
+        snapshotDf = self._fetchSnapshotUncached()
+        self._cachePut(SNAPSHOT_CACHE_KEY, snapshotDf)
+        return snapshotDf.copy()
+
+    def _fetchSnapshotUncached(self):
+        for tag, source in self.sources:
+            if tag == "akshare":
+                break
+        else:
+            raise RuntimeError("全市场快照需要 Akshare 数据源")
+        br = self.breakers.get(tag)
+        if br and br.isOpen():
+            raise RuntimeError("Akshare 数据源熔断中，请稍后重试")
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            snapshotDf = executor.submit(source.fetchSnapshot).result(timeout=self.primaryTimeoutSec)
+        except concurrent.futures.TimeoutError:
+            if br:
+                br.onFailure()
+            raise RuntimeError("Akshare 全市场快照超时")
+        except Exception:
+            if br:
+                br.onFailure()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+        if br:
+            br.onSuccess()
+        snapshotDf["dataSource"] = tag
+        snapshotDf["fetchedAt"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return snapshotDf
+
 
 def normalizeCode(stockCode: str) -> str:
     cleaned = stockCode.strip()
@@ -395,7 +703,124 @@ def normalizeCode(stockCode: str) -> str:
     return cleaned
 
 
+_defaultClient: Optional[MultiSourceClient] = None
+_defaultClientLock = threading.Lock()
+
+
+def getDefaultClient() -> MultiSourceClient:
+    """进程内共享的客户端，使行情缓存、熔断状态在多次查询间复用。"""
+    global _defaultClient
+    with _defaultClientLock:
+        if _defaultClient is None:
+            _defaultClient = MultiSourceClient(primaryTimeoutSec=60, maxRetries=3, defaultMinIntervalMs=10,
+                                               persistPath=os.path.join(defaultCacheDir(), "quote_cache.json"))
+        return _defaultClient
+
+
 def fetchQuoteMultiSource(stockCode: str) -> Dict[str, Any]:
     normalizedCode = normalizeCode(stockCode)
-    client = MultiSourceClient(primaryTimeoutSec=60, maxRetries=3, defaultMinIntervalMs=10)
-    return client.fetchQuote(normalizedCode)
\ No newline at end of file
+    return getDefaultClient().fetchQuote(normalizedCode)
+
+
+SCREEN_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+SCREEN_FILTER_PATTERN = re.compile(r"^\s*([A-Za-z_]+)\s*(>=|<=|==|!=|>|<)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*$")
+# 可参与筛选/排序的数值字段
+SCREEN_NUMERIC_FIELDS = ("openPrice", "closePrice", "highPrice", "lowPrice", "volume",
+                         "amount", "changePct", "turnoverRate", "prevClose")
+# 可参与排名的字段，筛选/排序时以 "<字段>Rank" 引用，例如 volumeRank<=50（1 为最大）
+RANKABLE_FIELDS = ("volume", "amount", "changePct", "turnoverRate", "closePrice")
+
+
+def parseScreenFilter(expression: str) -> Tuple[str, str, float]:
+    """解析形如 "changePct>5"、"closePrice<=20" 的筛选表达式。"""
+    matched = SCREEN_FILTER_PATTERN.match(expression)
+    if not matched:
+        raise ValueError(f"无法解析筛选条件：{expression}（示例：changePct>5）")
+    field, op, value = matched.groups()
+    return field, op, float(value)
+
+
+def _rankBaseField(field: str) -> Optional[str]:
+    baseField = field[:-len("Rank")] if field.endswith("Rank") else None
+    return baseField if baseField in RANKABLE_FIELDS else None
+
+
+def validateScreenField(field: str) -> None:
+    """仅允许数值字段与排名字段参与筛选/排序。"""
+    if field not in SCREEN_NUMERIC_FIELDS and _rankBaseField(field) is None:
+        allowed = "、".join(SCREEN_NUMERIC_FIELDS + tuple(f + "Rank" for f in RANKABLE_FIELDS))
+        raise ValueError(f"未知的筛选字段：{field}（可用：{allowed}）")
+
+
+def _ensureScreenField(snapshotDf, field: str) -> None:
+    validateScreenField(field)
+    if field in snapshotDf.columns:
+        return
+    baseField = _rankBaseField(field)
+    if baseField is not None and baseField in snapshotDf.columns:
+        snapshotDf[field] = snapshotDf[baseField].rank(ascending=False, method="min").astype("int64")
+        return
+    raise ValueError(f"快照中缺少字段：{field}")
+
+
+def screenSnapshot(snapshotDf, filters: Optional[List[str]] = None, sortBy: Optional[str] = None,
+                   descending: Optional[bool] = None, topN: Optional[int] = None):
+    """在全市场快照上以向量化方式执行筛选、排序与取前 N。
+
+    descending 为 None 时，排名字段（1 为最大）按升序，其余字段按降序。
+    """
+    if topN is not None and topN < 1:
+        raise ValueError("topN 必须为正整数")
+    if descending is None:
+        descending = not (sortBy and _rankBaseField(sortBy))
+    parsedFilters = [parseScreenFilter(expr) for expr in (filters or [])]
+    snapshotDf = snapshotDf.copy()
+    # 排名字段基于全市场计算，须在过滤前补齐
+    for field in [f for f, _, _ in parsedFilters] + ([sortBy] if sortBy else []):
+        _ensureScreenField(snapshotDf, field)
+    mask = None
+    for field, op, value in parsedFilters:
+        condition = SCREEN_OPERATORS[op](snapshotDf[field], value)
+        mask = condition if mask is None else (mask & condition)
+    resultDf = snapshotDf[mask] if mask is not None else snapshotDf
+    if sortBy:
+        if topN is not None:
+            # 取前 N 时使用部分排序，避免对全表做完整排序
+            pick = resultDf.nlargest if descending else resultDf.nsmallest
+            return pick(topN, sortBy).reset_index(drop=True)
+        resultDf = resultDf.sort_values(sortBy, ascending=not descending, kind="mergesort")
+    if topN is not None:
+        resultDf = resultDf.head(topN)
+    return resultDf.reset_index(drop=True)
+
+
+def iterScreenRecords(resultDf) -> Iterator[Dict[str, Any]]:
+    """逐行产出筛选结果（原生 Python 类型），便于流式输出 NDJSON/CSV。"""
+    columns = list(resultDf.columns)
+    for values in resultDf.itertuples(index=False, name=None):
+        yield {column: (value.item() if hasattr(value, "item") else value)
+               for column, value in zip(columns, values)}
+
+
+def screenMarket(filters: Optional[List[str]] = None, sortBy: Optional[str] = None,
+                 descending: Optional[bool] = None, topN: Optional[int] = None,
+                 client: Optional[MultiSourceClient] = None):
+    """一次上游调用拉取全市场快照后执行筛选。"""
+    # 先校验表达式与字段，避免无效请求
+    for expression in filters or []:
+        validateScreenField(parseScreenFilter(expression)[0])
+    if sortBy:
+        validateScreenField(sortBy)
+    if topN is not None and topN < 1:
+        raise ValueError("topN 必须为正整数")
+    if client is None:
+        client = getDefaultClient()
+    return screenSnapshot(client.fetchSnapshot(), filters=filters, sortBy=sortBy,
+                          descending=descending, topN=topN)
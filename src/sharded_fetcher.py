@@ -0,0 +1,207 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import logging
+import os
+import time
+import concurrent.futures
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, List, Tuple
+
+from multi_source_fetcher import MultiSourceClient, getDefaultClient, normalizeCode
+
+# 列式布局：每列在共享内存中连续存放，按 8 字节对齐
+FLOAT_COLUMNS = ("openPrice", "closePrice", "highPrice", "lowPrice", "fetchedAt")
+NAME_BYTES = 48  # 股票名称按 UTF-8 定长存放（中文 3 字节/字，足够 16 个字）
+SOURCE_TAGS = ("sina", "tencent", "eastmoney", "akshare")
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 0
+STATUS_OK = 1
+
+
+def _align(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+class SharedQuoteColumns:
+    """基于 multiprocessing.shared_memory 的列式行情表，工作进程按行号直接写入。"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, rowCount: int, owner: bool) -> None:
+        self.shm = shm
+        self.rowCount = rowCount
+        self.owner = owner
+        offset = 0
+        self.floatViews: Dict[str, memoryview] = {}
+        for column in FLOAT_COLUMNS:
+            self.floatViews[column] = shm.buf[offset:offset + 8 * rowCount].cast("d")
+            offset += 8 * rowCount
+        self.volumeView = shm.buf[offset:offset + 8 * rowCount].cast("q")
+        offset += 8 * rowCount
+        self.nameView = shm.buf[offset:offset + NAME_BYTES * rowCount]
+        offset += _align(NAME_BYTES * rowCount)
+        self.statusView = shm.buf[offset:offset + rowCount]
+        offset += _align(rowCount)
+        self.sourceView = shm.buf[offset:offset + rowCount]
+
+    @staticmethod
+    def byteSize(rowCount: int) -> int:
+        return (8 * rowCount * (len(FLOAT_COLUMNS) + 1)
+                + _align(NAME_BYTES * rowCount) + _align(rowCount) + rowCount)
+
+    @classmethod
+    def create(cls, rowCount: int) -> "SharedQuoteColumns":
+        shm = shared_memory.SharedMemory(create=True, size=max(1, cls.byteSize(rowCount)))
+        columns = cls(shm, rowCount, owner=True)
+        columns.statusView[:] = bytes(rowCount)
+        return columns
+
+    @classmethod
+    def attach(cls, name: str, rowCount: int) -> "SharedQuoteColumns":
+        # 子进程与协调进程共用同一个 resource_tracker，仅由协调进程 unlink
+        return cls(shared_memory.SharedMemory(name=name), rowCount, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, rowIndex: int, quote: Dict[str, Any], fetchedAt: float) -> None:
+        for column in FLOAT_COLUMNS[:-1]:
+            self.floatViews[column][rowIndex] = float(quote.get(column) or 0.0)
+        self.floatViews["fetchedAt"][rowIndex] = fetchedAt
+        self.volumeView[rowIndex] = int(quote.get("volume") or 0)
+        encoded = str(quote.get("stockName") or "").encode("utf-8")[:NAME_BYTES]
+        encoded = encoded.decode("utf-8", "ignore").encode("utf-8")  # 避免截断半个汉字
+        start = rowIndex * NAME_BYTES
+        self.nameView[start:start + NAME_BYTES] = encoded.ljust(NAME_BYTES, b"\0")
+        tag = quote.get("dataSource")
+        self.sourceView[rowIndex] = SOURCE_TAGS.index(tag) if tag in SOURCE_TAGS else 255
+        # 状态最后写入，协调进程据此判断该行是否完整
+        self.statusView[rowIndex] = STATUS_OK
+
+    def read(self, rowIndex: int) -> Optional[Dict[str, Any]]:
+        if self.statusView[rowIndex] != STATUS_OK:
+            return None
+        start = rowIndex * NAME_BYTES
+        sourceIndex = self.sourceView[rowIndex]
+        return {
+            "stockName": bytes(self.nameView[start:start + NAME_BYTES]).rstrip(b"\0").decode("utf-8") or "未知名称",
+            "openPrice": self.floatViews["openPrice"][rowIndex],
+            "closePrice": self.floatViews["closePrice"][rowIndex],
+            "highPrice": self.floatViews["highPrice"][rowIndex],
+            "lowPrice": self.floatViews["lowPrice"][rowIndex],
+            "volume": self.volumeView[rowIndex],
+            "dataSource": SOURCE_TAGS[sourceIndex] if sourceIndex < len(SOURCE_TAGS) else "unknown",
+            "fetchedAt": datetime.fromtimestamp(self.floatViews["fetchedAt"][rowIndex]).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def close(self) -> None:
+        # memoryview 必须先释放，否则 SharedMemory.close 会报 BufferError
+        for view in self.floatViews.values():
+            view.release()
+        for view in (self.volumeView, self.nameView, self.statusView, self.sourceView):
+            view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _fetchShard(shmName: str, rowCount: int, startIndex: int, stockCodes: List[str],
+                defaultMinIntervalMs: int, rateLimitShare: int, batchSize: int) -> int:
+    """工作进程入口：用独立的 MultiSourceClient 拉取本分片，并直接写入共享列。"""
+    client = MultiSourceClient(primaryTimeoutSec=60, maxRetries=3, defaultMinIntervalMs=defaultMinIntervalMs,
+                               rateLimitShare=rateLimitShare, includeAkshare=False)
+    columns = SharedQuoteColumns.attach(shmName, rowCount)
+    try:
+        okCount = 0
+        for chunkStart in range(0, len(stockCodes), batchSize):
+            chunk = stockCodes[chunkStart:chunkStart + batchSize]
+            results = client.fetchQuotes(chunk, batchSize=batchSize, useCache=False)
+            fetchedAt = time.time()
+            for offset, code in enumerate(chunk, start=startIndex + chunkStart):
+                quote = results.get(code)
+                if quote is not None:
+                    columns.write(offset, quote, fetchedAt)
+                    okCount += 1
+        return okCount
+    finally:
+        columns.close()
+
+
+def splitShards(rowCount: int, workers: int) -> List[Tuple[int, int]]:
+    """将 [0, rowCount) 均分为连续区间，保证各进程写入的行互不重叠。"""
+    workers = max(1, min(workers, rowCount))
+    base, extra = divmod(rowCount, workers)
+    shards = []
+    start = 0
+    for workerIndex in range(workers):
+        end = start + base + (1 if workerIndex < extra else 0)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def fetchQuotesSharded(stockCodes: List[str], workers: Optional[int] = None, defaultMinIntervalMs: int = 10,
+                       batchSize: int = 100, client: Optional[MultiSourceClient] = None
+                       ) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """多进程分片获取行情，返回 (按输入顺序的成功行情, 失败代码)。
+
+    无法识别的代码原样计入失败代码，不影响其余代码。协调进程先查 client 的行情缓存，
+    休市期间已获取过的代码不再分发给工作进程，新结果写回缓存。
+    """
+    if batchSize < 1:
+        raise ValueError("batchSize 必须为正整数")
+    if workers is not None and workers < 1:
+        raise ValueError("workers 必须为正整数")
+    codes: List[str] = []
+    invalidCodes: List[str] = []
+    for code in stockCodes:
+        try:
+            codes.append(normalizeCode(code))
+        except ValueError:
+            invalidCodes.append(code)
+    allCodes = list(dict.fromkeys(codes))
+    if not allCodes:
+        return [], invalidCodes
+    client = client or getDefaultClient()
+    cached = client.cachedQuotes(allCodes)
+    codes = [code for code in allCodes if code not in cached]
+    fetched = _fetchSharded(codes, workers, defaultMinIntervalMs, batchSize) if codes else {}
+    client.storeQuotes(fetched)
+    quotes: List[Dict[str, Any]] = []
+    failedCodes: List[str] = list(invalidCodes)
+    for code in allCodes:
+        quote = cached.get(code) or fetched.get(code)
+        if quote is None:
+            failedCodes.append(code)
+        else:
+            quotes.append({"stockCode": code, **quote})
+    return quotes, failedCodes
+
+
+def _fetchSharded(codes: List[str], workers: Optional[int], defaultMinIntervalMs: int,
+                  batchSize: int) -> Dict[str, Dict[str, Any]]:
+    workers = workers or os.cpu_count() or 1
+    shards = splitShards(len(codes), workers)
+    columns = SharedQuoteColumns.create(len(codes))
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = {executor.submit(_fetchShard, columns.name, len(codes), start, codes[start:end],
+                                       defaultMinIntervalMs, len(shards), batchSize): (start, end)
+                       for start, end in shards}
+            for future, (start, end) in futures.items():
+                try:
+                    future.result()
+                except Exception:
+                    # 单个分片失败不影响其它分片已写入的行；该分片未完成的行状态仍为待定，按失败返回
+                    logger.exception("分片 [%d, %d) 获取失败", start, end)
+        fetched: Dict[str, Dict[str, Any]] = {}
+        for rowIndex, code in enumerate(codes):
+            quote = columns.read(rowIndex)
+            if quote is not None:
+                fetched[code] = quote
+        return fetched
+    finally:
+        columns.close()
@@ -0,0 +1,225 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Any, Iterable, Optional, Set
+
+# 沪深交易所统一使用北京时间（无夏令时，固定 UTC+8）
+CHINA_TZ = timezone(timedelta(hours=8), "Asia/Shanghai")
+
+# 上交所/深交所交易时段：开盘集合竞价、上午连续竞价、下午连续竞价（含深市收盘集合竞价）
+AUCTION_START = dtime(9, 15)
+MORNING_OPEN = dtime(9, 30)
+MORNING_CLOSE = dtime(11, 30)
+AFTERNOON_OPEN = dtime(13, 0)
+AFTERNOON_CLOSE = dtime(15, 0)
+
+PHASE_CLOSED_DAY = "closed_day"   # 周末/节假日
+PHASE_PRE_OPEN = "pre_open"       # 开盘前
+PHASE_AUCTION = "auction"         # 开盘集合竞价
+PHASE_MORNING = "morning"
+PHASE_LUNCH = "lunch"             # 午间休市
+PHASE_AFTERNOON = "afternoon"
+PHASE_POST_CLOSE = "post_close"   # 收盘后
+
+ACTIVE_PHASES = (PHASE_AUCTION, PHASE_MORNING, PHASE_AFTERNOON)
+
+CALENDAR_MAX_AGE_SEC = 7 * 24 * 3600  # 本地交易日历超过一周才重新下载
+
+
+def defaultCacheDir() -> str:
+    """本地缓存目录：Windows 使用 %LOCALAPPDATA%，其他平台使用 XDG 缓存目录。"""
+    baseDir = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(baseDir, "StockQuery")
+
+
+def defaultCalendarPath() -> str:
+    return os.path.join(defaultCacheDir(), "trade_calendar.json")
+
+
+def writeJsonAtomic(path: str, payload: Any) -> None:
+    """先写临时文件再替换，避免并发读取到半个文件。"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath, "w", encoding="utf-8") as tmpFile:
+        json.dump(payload, tmpFile, ensure_ascii=False)
+    os.replace(tmpPath, path)
+
+
+class TradingCalendar:
+    """沪深 A 股交易日历与交易时段模型。
+
+    未提供交易日数据时按“周一至周五”判断，可通过 holidays 补充休市日期；
+    交易日数据可随时通过 setTradeDates 更新，覆盖范围之外的日期仍回退到周规则。
+    """
+
+    def __init__(self, holidays: Optional[Iterable[date]] = None, tradeDates: Optional[Iterable[date]] = None,
+                 closeGraceSec: int = 120) -> None:
+        self.holidays: Set[date] = set(holidays or [])
+        self.tradeDates: Set[date] = set()
+        self.firstTradeDate: Optional[date] = None
+        self.lastTradeDate: Optional[date] = None
+        self.setTradeDates(tradeDates or [])
+        # 收盘/午休后的结算宽限期，期间行情可能仍在更新
+        self.closeGraceSec = closeGraceSec
+
+    def setTradeDates(self, tradeDates: Iterable[date]) -> None:
+        tradeDates = set(tradeDates)
+        # 先写边界再替换集合，其他线程读到的始终是一致的一组数据或空集合
+        self.tradeDates = set()
+        self.firstTradeDate = min(tradeDates) if tradeDates else None
+        self.lastTradeDate = max(tradeDates) if tradeDates else None
+        self.tradeDates = tradeDates
+
+    def loadTradeDates(self, path: str) -> bool:
+        """从本地文件读取交易日，文件缺失或损坏时返回 False。"""
+        try:
+            with open(path, "r", encoding="utf-8") as calendarFile:
+                payload = json.load(calendarFile)
+            self.setTradeDates(date.fromisoformat(d) for d in payload["tradeDates"])
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def saveTradeDates(self, path: str) -> None:
+        writeJsonAtomic(path, {"tradeDates": sorted(d.isoformat() for d in self.tradeDates)})
+
+    def loadFromAkshareInBackground(self, savePath: Optional[str] = None) -> threading.Thread:
+        """后台加载新浪交易日历，不阻塞行情查询；加载完成前按周规则判断。
+
+        仅供盯盘、GUI 等常驻模式调用；成功后写入 savePath，供后续进程离线使用。
+        """
+        thread = threading.Thread(target=self._loadFromAkshare, args=(savePath,),
+                                  name="trade-calendar-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def _loadFromAkshare(self, savePath: Optional[str]) -> None:
+        try:
+            import akshare as ak  # 延迟导入以避免打包问题
+            df = ak.tool_trade_date_hist_sina()
+            self.setTradeDates(d if isinstance(d, date) else datetime.strptime(str(d)[:10], "%Y-%m-%d").date()
+                               for d in df["trade_date"])
+            if savePath:
+                self.saveTradeDates(savePath)
+        except Exception:
+            pass
+
+    def now(self) -> datetime:
+        return datetime.now(CHINA_TZ)
+
+    def toChina(self, moment: Optional[datetime]) -> datetime:
+        if moment is None:
+            return self.now()
+        if moment.tzinfo is None:
+            moment = moment.astimezone()  # 视为本机本地时间
+        return moment.astimezone(CHINA_TZ)
+
+    def isTradingDay(self, day: date) -> bool:
+        if day in self.holidays:
+            return False
+        tradeDates = self.tradeDates
+        if tradeDates and self.firstTradeDate <= day <= self.lastTradeDate:
+            return day in tradeDates
+        return day.weekday() < 5
+
+    def phaseAt(self, moment: Optional[datetime] = None) -> str:
+        moment = self.toChina(moment)
+        if not self.isTradingDay(moment.date()):
+            return PHASE_CLOSED_DAY
+        clock = moment.time()
+        if clock < AUCTION_START:
+            return PHASE_PRE_OPEN
+        if clock < MORNING_OPEN:
+            return PHASE_AUCTION
+        if clock < MORNING_CLOSE:
+            return PHASE_MORNING
+        if clock < AFTERNOON_OPEN:
+            return PHASE_LUNCH
+        if clock < AFTERNOON_CLOSE:
+            return PHASE_AFTERNOON
+        return PHASE_POST_CLOSE
+
+    def isActive(self, moment: Optional[datetime] = None) -> bool:
+        return self.phaseAt(moment) in ACTIVE_PHASES
+
+    def _at(self, day: date, clock: dtime) -> datetime:
+        return datetime.combine(day, clock, tzinfo=CHINA_TZ)
+
+    def nextOpen(self, moment: Optional[datetime] = None) -> datetime:
+        """下一次行情开始变动的时间（午休结束或下一交易日集合竞价）。"""
+        moment = self.toChina(moment)
+        phase = self.phaseAt(moment)
+        if phase in ACTIVE_PHASES:
+            return moment
+        if phase == PHASE_PRE_OPEN:
+            return self._at(moment.date(), AUCTION_START)
+        if phase == PHASE_LUNCH:
+            return self._at(moment.date(), AFTERNOON_OPEN)
+        day = moment.date() + timedelta(days=1)
+        for _ in range(366):
+            if self.isTradingDay(day):
+                break
+            day += timedelta(days=1)
+        return self._at(day, AUCTION_START)
+
+    def quoteValidUntil(self, fetchedAt: Optional[datetime] = None) -> Optional[datetime]:
+        """非交易时段获取的行情在下次开盘前不会变化，返回其有效期；交易时段内返回 None。"""
+        fetchedAt = self.toChina(fetchedAt)
+        phase = self.phaseAt(fetchedAt)
+        if phase in ACTIVE_PHASES:
+            return None
+        lastClose = {PHASE_LUNCH: MORNING_CLOSE, PHASE_POST_CLOSE: AFTERNOON_CLOSE}.get(phase)
+        if lastClose is not None:
+            settledAt = self._at(fetchedAt.date(), lastClose) + timedelta(seconds=self.closeGraceSec)
+            if fetchedAt < settledAt:
+                return None
+        return self.nextOpen(fetchedAt)
+
+
+class TradingScheduler:
+    """按交易时段调节轮询节奏：盘中按固定间隔，休市时暂停到下次开盘。"""
+
+    def __init__(self, calendar: TradingCalendar, activeIntervalSec: float = 5.0, maxSleepSec: float = 3600.0) -> None:
+        self.calendar = calendar
+        self.activeIntervalSec = activeIntervalSec
+        # 长时间休眠分段进行，便于应对系统休眠/时钟调整
+        self.maxSleepSec = maxSleepSec
+
+    def nextDelaySec(self, moment: Optional[datetime] = None) -> float:
+        moment = self.calendar.toChina(moment)
+        # 盘中及刚收盘的宽限期内按固定间隔，以便拿到最终收盘价
+        if self.calendar.quoteValidUntil(moment) is None:
+            return self.activeIntervalSec
+        waitSec = (self.calendar.nextOpen(moment) - moment).total_seconds()
+        return max(self.activeIntervalSec, min(waitSec, self.maxSleepSec))
+
+
+_defaultCalendar: Optional[TradingCalendar] = None
+_defaultCalendarLock = threading.Lock()
+
+
+def getDefaultCalendar() -> TradingCalendar:
+    """进程内共享的交易日历：读取本地交易日文件，不发起网络请求；无文件时按周规则判断。"""
+    global _defaultCalendar
+    with _defaultCalendarLock:
+        if _defaultCalendar is None:
+            _defaultCalendar = TradingCalendar()
+            _defaultCalendar.loadTradeDates(defaultCalendarPath())
+        return _defaultCalendar
+
+
+def refreshDefaultCalendarInBackground(maxAgeSec: float = CALENDAR_MAX_AGE_SEC) -> Optional[threading.Thread]:
+    """常驻模式下按需刷新本地交易日历；文件足够新时不发起请求。"""
+    path = defaultCalendarPath()
+    try:
+        if time.time() - os.path.getmtime(path) < maxAgeSec:
+            return None
+    except OSError:
+        pass
+    return getDefaultCalendar().loadFromAkshareInBackground(savePath=path)
@@ -2,7 +2,12 @@
 # Copyright (c) 2025 空游
 # SPDX-License-Identifier: MIT
 import argparse
-from typing import Dict, Any
+import csv
+import json
+import multiprocessing
+import sys
+import time
+from typing import Dict, Any, Iterable, Optional, TextIO
 from datetime import datetime
 
 
@@ -56,15 +61,152 @@ def printBasicQuote(quote: dict):
     print("版权声明：本程序由空游开发 · 许可证：MIT License")
 
 
+def positiveInt(value: str) -> int:
+    """argparse 类型：正整数。"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"应为正整数：{value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数：{value}")
+    return number
+
+
+def writeRecords(records: Iterable[Dict[str, Any]], outputFormat: str, stream: Optional[TextIO] = None) -> int:
+    """将记录逐行流式写出为 NDJSON 或 CSV，返回写出的行数。"""
+    stream = stream or sys.stdout
+    count = 0
+    writer = None
+    for record in records:
+        if outputFormat == "csv":
+            if writer is None:
+                writer = csv.DictWriter(stream, fieldnames=list(record.keys()), lineterminator="\n")
+                writer.writeheader()
+            writer.writerow(record)
+        else:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    stream.flush()
+    return count
+
+
+def runScreen(args, parser) -> None:
+    from multi_source_fetcher import screenMarket, iterScreenRecords
+    descending = {"asc": False, "desc": True}.get(args.order)
+    try:
+        resultDf = screenMarket(filters=args.filter, sortBy=args.sort,
+                                descending=descending, topN=args.top)
+    except ValueError as e:
+        parser.error(str(e))
+    except RuntimeError as e:
+        # 数据源不可用/熔断等上游错误，直接给出提示而非堆栈
+        parser.exit(1, f"筛选失败：{e}\n")
+    writeRecords(iterScreenRecords(resultDf), args.format)
+
+
+def loadCodes(args) -> list:
+    rawCodes = [code.strip() for code in (args.codes or "").split(",") if code.strip()]
+    if args.codes_file:
+        # utf-8-sig：兼容记事本保存的带 BOM 文件
+        with open(args.codes_file, "r", encoding="utf-8-sig") as codesFile:
+            rawCodes.extend(line.strip() for line in codesFile if line.strip())
+    codes = []
+    invalidCodes = []
+    for code in rawCodes:
+        try:
+            codes.append(validateStockCode(code))
+        except ValueError:
+            invalidCodes.append(code)
+    if invalidCodes:
+        print(f"已跳过无效代码（{len(invalidCodes)} 个）: {','.join(invalidCodes)}", file=sys.stderr)
+    return codes
+
+
+def runBatch(args) -> None:
+    from sharded_fetcher import fetchQuotesSharded
+    codes = loadCodes(args)
+    if not codes:
+        raise SystemExit("请通过 --codes 或 --codes-file 提供股票代码")
+    quotes, failedCodes = fetchQuotesSharded(codes, workers=args.workers, batchSize=args.batch_size)
+    writeRecords(quotes, args.format)
+    if failedCodes:
+        print(f"以下代码获取失败（{len(failedCodes)} 只）: {','.join(failedCodes)}", file=sys.stderr)
+
+
+def runWatch(args) -> None:
+    from multi_source_fetcher import getDefaultClient, normalizeCode
+    from trading_session import TradingScheduler, refreshDefaultCalendarInBackground
+    stockCode = normalizeCode(args.code)
+    client = getDefaultClient()
+    # 常驻模式才下载交易日历（本地文件过期时），单次查询只读本地文件
+    refreshDefaultCalendarInBackground()
+    scheduler = TradingScheduler(client.calendar, activeIntervalSec=args.interval)
+    lastFetchedAt = None
+    while True:
+        try:
+            # 休市期间命中缓存，不产生上游请求
+            quote = client.fetchQuote(stockCode)
+        except Exception as e:
+            print(f"查询失败: {e}", file=sys.stderr)
+        else:
+            if quote.get("fetchedAt") != lastFetchedAt:
+                lastFetchedAt = quote.get("fetchedAt")
+                if args.format == "ndjson":
+                    writeRecords([dict(quote, stockCode=stockCode)], "ndjson")
+                else:
+                    printBasicQuote(quote)
+        delaySec = scheduler.nextDelaySec()
+        if delaySec > args.interval:
+            nextOpen = client.calendar.nextOpen().strftime("%Y-%m-%d %H:%M")
+            print(f"休市中，暂停轮询（下次开盘 {nextOpen}）", file=sys.stderr)
+        time.sleep(delaySec)
+
+
 def main():
     parser = argparse.ArgumentParser(description="股票查询CLI · 多源稳健版")
-    parser.add_argument("--code", required=True, help="股票代码，例如 600519")
+    parser.add_argument("--code", help="股票代码，例如 600519")
+    subparsers = parser.add_subparsers(dest="command")
+
+    screenParser = subparsers.add_parser("screen", help="全市场筛选（单次快照 + 向量化计算）")
+    screenParser.add_argument("--filter", action="append", default=[],
+                              help="筛选条件，可重复，例如 changePct>5、closePrice<=20、volumeRank<=50")
+    screenParser.add_argument("--sort", help="排序字段，例如 changePct、volume")
+    orderGroup = screenParser.add_mutually_exclusive_group()
+    orderGroup.add_argument("--asc", dest="order", action="store_const", const="asc",
+                            help="升序排序（默认：排名字段如 volumeRank 升序，其余字段降序）")
+    orderGroup.add_argument("--desc", dest="order", action="store_const", const="desc", help="降序排序")
+    screenParser.add_argument("--top", type=positiveInt, help="仅输出前 N 条")
+    screenParser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="输出格式")
+
+    batchParser = subparsers.add_parser("batch", help="多进程分片批量查询（共享内存列式结果）")
+    batchParser.add_argument("--codes", help="逗号分隔的股票代码，例如 600519,000001")
+    batchParser.add_argument("--codes-file", help="股票代码文件，每行一个")
+    batchParser.add_argument("--workers", type=positiveInt, help="工作进程数（默认 CPU 核数）")
+    batchParser.add_argument("--batch-size", type=positiveInt, default=100, help="单次批量请求的代码数")
+    batchParser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="输出格式")
+
+    watchParser = subparsers.add_parser("watch", help="按交易时段轮询单只股票（休市自动暂停）")
+    watchParser.add_argument("--code", required=True, help="股票代码，例如 600519")
+    watchParser.add_argument("--interval", type=float, default=5.0, help="盘中轮询间隔（秒）")
+    watchParser.add_argument("--format", choices=["text", "ndjson"], default="text", help="输出格式")
+
     args = parser.parse_args()
+    if args.command == "screen":
+        runScreen(args, screenParser)
+        return
+    if args.command == "batch":
+        runBatch(args)
+        return
+    if args.command == "watch":
+        runWatch(args)
+        return
+    if not args.code:
+        parser.error("请通过 --code 指定股票代码，或使用 screen/batch/watch 子命令")
     from multi_source_fetcher import fetchQuoteMultiSource
     quote = fetchQuoteMultiSource(args.code)
     printBasicQuote(quote)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # PyInstaller 打包后多进程分片所需
     main()
-
@@ -126,6 +126,12 @@ class StockQueryApp:
 
 
 def main() -> None:
+    try:
+        # GUI 为常驻进程：本地交易日历过期时在后台刷新
+        from trading_session import refreshDefaultCalendarInBackground
+        refreshDefaultCalendarInBackground()
+    except Exception:
+        pass
     root = tk.Tk()
     app = StockQueryApp(root)
     root.mainloop()
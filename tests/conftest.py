@@ -0,0 +1,19 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import os
+import sys
+
+# 测试直接导入 src/ 下的模块
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolatedCacheDir(tmp_path, monkeypatch):
+    """本地缓存目录指向临时目录，测试不读写用户真实缓存。"""
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    return tmp_path / "cache"
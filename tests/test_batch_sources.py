@@ -0,0 +1,75 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import pytest
+
+pytest.importorskip("requests")
+
+import multi_source_fetcher as msf  # noqa: E402
+
+SINA_TEXT = (
+    'var hq_str_sh600519="贵州茅台,1700.00,1690.00,1710.50,1720.00,1680.00,1710.4,1710.5,12345";\n'
+    'var hq_str_sz000001="平安银行,10.1,10.0,10.2,10.3,9.9,1,1,5000";\n'
+    'var hq_str_sz999999="";\n'
+)
+TENCENT_TEXT = (
+    'v_sh600519="1~贵州茅台~600519~1710.50~1690.00~1700.00~12345~";\n'
+    'v_sz000001="51~平安银行~000001~10.2~10.0~10.1~5000~";\n'
+    'v_pv_none_match="1";\n'
+)
+
+
+def makeSource(sourceClass, text):
+    robotsChecker = msf.RobotsChecker()
+    source = sourceClass(robotsChecker, msf.RateLimiter(robotsChecker), msf.SessionFactory())
+    source._request = lambda mappedCodes: text
+    return source
+
+
+@pytest.mark.parametrize("sourceClass, text", [
+    (msf.SinaSource, SINA_TEXT),
+    (msf.TencentSource, TENCENT_TEXT),
+])
+def test_batch_payload_parsing(sourceClass, text):
+    results = makeSource(sourceClass, text).fetchQuotes(["600519", "000001", "999999"])
+    assert sorted(results) == ["000001", "600519"]
+    assert results["600519"]["stockName"] == "贵州茅台"
+    assert results["600519"]["closePrice"] == 1710.5
+    assert results["000001"]["volume"] == 500000
+
+
+class FlakySource(msf.SourceBase):
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.calls = 0
+
+    def fetchQuote(self, stockCode):
+        self.calls += 1
+        if stockCode in self.failing:
+            raise RuntimeError("down")
+        return {"stockName": stockCode, "openPrice": 1.0, "closePrice": 1.0,
+                "highPrice": 1.0, "lowPrice": 1.0, "volume": 1}
+
+
+def test_default_batch_fails_fast_when_source_is_down():
+    codes = [str(i).zfill(6) for i in range(1, 101)]
+    source = FlakySource(codes)
+    with pytest.raises(RuntimeError):
+        source.fetchQuotes(codes)
+    assert source.calls == 3
+
+
+def test_default_batch_keeps_partial_results():
+    source = FlakySource(["000001"])
+    assert sorted(source.fetchQuotes(["000001", "000002"])) == ["000002"]
+
+
+def test_batch_failures_reach_circuit_breaker(monkeypatch):
+    monkeypatch.setattr(msf.time, "sleep", lambda sec: None)
+    client = msf.MultiSourceClient.__new__(msf.MultiSourceClient)
+    client.maxRetries = 1
+    client.breakers = {"eastmoney": msf.CircuitBreaker(failThreshold=2)}
+    source = FlakySource(["000001"])
+    for _ in range(2):
+        assert client._trySourceBatch("eastmoney", source, ["000001"]) == {}
+    assert client.breakers["eastmoney"].isOpen()
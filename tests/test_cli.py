@@ -0,0 +1,52 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import argparse
+import importlib
+import io
+import json
+
+import pytest
+
+cli = importlib.import_module("股票查询")
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "abc"])
+def test_positive_int_rejects(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli.positiveInt(value)
+
+
+def test_write_records_ndjson_and_csv():
+    records = [{"stockCode": "600519", "stockName": "贵州茅台", "closePrice": 1710.5},
+               {"stockCode": "000001", "stockName": "平安银行", "closePrice": 10.2}]
+    ndjson = io.StringIO()
+    assert cli.writeRecords(iter(records), "ndjson", ndjson) == 2
+    assert [json.loads(line) for line in ndjson.getvalue().splitlines()] == records
+    csvOut = io.StringIO()
+    assert cli.writeRecords(iter(records), "csv", csvOut) == 2
+    assert csvOut.getvalue().splitlines() == [
+        "stockCode,stockName,closePrice",
+        "600519,贵州茅台,1710.5",
+        "000001,平安银行,10.2",
+    ]
+
+
+def test_load_codes_handles_bom_and_invalid_lines(tmp_path, capsys):
+    codesFile = tmp_path / "codes.txt"
+    codesFile.write_bytes("\ufeff600519\nabc\n\n1\n".encode("utf-8"))
+    args = argparse.Namespace(codes="300750, x", codes_file=str(codesFile))
+    assert cli.loadCodes(args) == ["300750", "600519", "000001"]
+    assert "x,abc" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [
+    ["batch", "--codes", "600519", "--batch-size", "0"],
+    ["batch", "--codes", "600519", "--workers", "-2"],
+    ["screen", "--top", "0"],
+])
+def test_parser_rejects_non_positive_values(monkeypatch, argv):
+    monkeypatch.setattr(cli.sys, "argv", ["股票查询"] + argv)
+    with pytest.raises(SystemExit) as excInfo:
+        cli.main()
+    assert excInfo.value.code == 2
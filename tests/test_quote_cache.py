@@ -0,0 +1,126 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("requests")
+
+import multi_source_fetcher as msf  # noqa: E402
+
+
+class SettledCalendar:
+    """休市日历：任何时刻获取的行情都有效至一小时后。"""
+
+    def quoteValidUntil(self, fetchedAt):
+        return datetime.now().astimezone() + timedelta(hours=1)
+
+
+class CountingSource(msf.SourceBase):
+    def __init__(self):
+        self.calls = 0
+
+    def fetchQuote(self, stockCode):
+        self.calls += 1
+        return {"stockName": stockCode, "openPrice": 1.0, "closePrice": 2.0,
+                "highPrice": 2.0, "lowPrice": 1.0, "volume": 100}
+
+    def fetchQuotes(self, stockCodes):
+        return {code: self.fetchQuote(code) for code in stockCodes}
+
+
+def makeClient(calendar):
+    source = CountingSource()
+
+    class Client(msf.MultiSourceClient):
+        def _buildSources(self):
+            self._addSource("sina", source)
+
+    return Client(calendar=calendar), source
+
+
+def test_off_hours_quote_served_from_cache():
+    client, source = makeClient(SettledCalendar())
+    first = client.fetchQuote("600519")
+    first["closePrice"] = 99.0
+    assert client.fetchQuote("600519")["closePrice"] == 2.0
+    assert source.calls == 1
+
+
+def test_use_cache_false_skips_calendar_and_cache():
+    class ExplodingCalendar:
+        def quoteValidUntil(self, fetchedAt):
+            raise AssertionError("calendar should not be consulted")
+
+    client, source = makeClient(ExplodingCalendar())
+    client.fetchQuote("600519", useCache=False)
+    assert client.quoteCache == {}
+
+
+def test_batch_reuses_cached_quotes():
+    client, source = makeClient(SettledCalendar())
+    assert sorted(client.fetchQuotes(["600519", "000001"])) == ["000001", "600519"]
+    assert sorted(client.fetchQuotes(["600519", "000001", "000002"])) == ["000001", "000002", "600519"]
+    assert source.calls == 3
+
+
+def test_sharded_refresh_served_from_cache_without_workers(monkeypatch):
+    import sharded_fetcher
+
+    def noWorkers(*args, **kwargs):
+        raise AssertionError("workers should not be started")
+
+    client, source = makeClient(SettledCalendar())
+    client.fetchQuotes(["600519", "000001"])
+    monkeypatch.setattr(sharded_fetcher, "_fetchSharded", noWorkers)
+    quotes, failedCodes = sharded_fetcher.fetchQuotesSharded(["600519", "1"], client=client)
+    assert [quote["stockCode"] for quote in quotes] == ["600519", "000001"]
+    assert failedCodes == []
+
+
+def test_settled_quotes_persist_across_clients(tmp_path):
+    path = str(tmp_path / "quote_cache.json")
+    client, source = makeClient(SettledCalendar())
+    client.persistPath = path
+    client.fetchQuote("600519")
+    client.fetchQuotes(["000001", "000002"])
+
+    nextClient, nextSource = makeClient(SettledCalendar())
+    nextClient.persistPath = path
+    nextClient._loadPersisted()
+    assert nextClient.fetchQuote("600519")["closePrice"] == 2.0
+    assert sorted(nextClient.fetchQuotes(["000001", "000002"])) == ["000001", "000002"]
+    assert nextSource.calls == 0
+
+
+def test_intraday_quotes_not_persisted(tmp_path):
+    class OpenCalendar:
+        def quoteValidUntil(self, fetchedAt):
+            return None
+
+    path = tmp_path / "quote_cache.json"
+    client, source = makeClient(OpenCalendar())
+    client.persistPath = str(path)
+    client.fetchQuote("600519")
+    assert not path.exists()
+
+
+def test_screen_makes_a_single_upstream_call(monkeypatch):
+    pytest.importorskip("pandas")
+    import types
+    import trading_session
+    from test_screener import makeRawSpot
+
+    calls = []
+    stub = types.SimpleNamespace(
+        stock_zh_a_spot_em=lambda: calls.append("spot") or makeRawSpot(),
+        tool_trade_date_hist_sina=lambda: calls.append("calendar"),
+    )
+    monkeypatch.setitem(sys.modules, "akshare", stub)
+    monkeypatch.setattr(trading_session, "_defaultCalendar", None)
+    client = msf.MultiSourceClient()
+    msf.screenMarket(["changePct>5"], client=client)
+    msf.screenMarket(["changePct>5"], client=client)
+    assert calls == ["spot"]
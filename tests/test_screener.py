@@ -0,0 +1,95 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import types
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("requests")
+
+from multi_source_fetcher import AkshareSource, parseScreenFilter, screenSnapshot  # noqa: E402
+
+
+def makeRawSpot():
+    return pd.DataFrame({
+        "代码": [600519, 1, 300750, 2],
+        "名称": ["贵州茅台", "平安银行", None, " "],
+        "最新价": [1700.0, 10.0, float("nan"), 0.0],
+        "收盘": [1690.0, 9.9, 180.0, 0.0],
+        "昨收": [1680.0, 9.8, 179.0, 5.5],
+        "涨跌幅": [1.2, 6.5, 0.0, 8.0],
+        "成交量": [1000, 5000, 0, 3000],
+        "成交额": [1.7e6, 5e4, 0.0, 1.6e4],
+        "最高": [1710.0, 10.2, 0.0, 5.6],
+        "最低": [1695.0, 9.9, 0.0, 5.4],
+        "今开": [1700.0, 9.95, 0.0, 5.5],
+        "换手率": [0.1, 0.5, 0.0, 0.3],
+    })
+
+
+def makeSource():
+    source = AkshareSource.__new__(AkshareSource)
+    source.ak = types.SimpleNamespace(stock_zh_a_spot_em=makeRawSpot)
+    return source
+
+
+@pytest.mark.parametrize("expression, expected", [
+    (" changePct >= -2.5 ", ("changePct", ">=", -2.5)),
+    ("amount>1e8", ("amount", ">", 1e8)),
+    ("turnoverRate<.5", ("turnoverRate", "<", 0.5)),
+    ("changePct>+3.", ("changePct", ">", 3.0)),
+])
+def test_parse_screen_filter(expression, expected):
+    assert parseScreenFilter(expression) == expected
+
+
+def test_parse_screen_filter_rejects_garbage():
+    with pytest.raises(ValueError):
+        parseScreenFilter("changePct ~ 5")
+
+
+def test_snapshot_row_fallbacks():
+    snapshotDf = makeSource().fetchSnapshot()
+    assert list(snapshotDf["stockCode"]) == ["600519", "000001", "300750", "000002"]
+    assert list(snapshotDf["stockName"])[2:] == ["未知名称", "未知名称"]
+    # 最新价缺失时回退到收盘，再回退到昨收
+    assert list(snapshotDf["closePrice"]) == [1700.0, 10.0, 180.0, 5.5]
+
+
+def test_fetch_quote_uses_snapshot():
+    quote = makeSource().fetchQuote("300750")
+    assert quote["stockName"] == "未知名称"
+    assert quote["closePrice"] == 180.0
+    assert quote["highPrice"] >= quote["closePrice"] >= quote["lowPrice"]
+
+
+def test_screen_filter_sort_top():
+    snapshotDf = makeSource().fetchSnapshot()
+    resultDf = screenSnapshot(snapshotDf, filters=["changePct>5"], sortBy="volume", topN=1)
+    assert list(resultDf["stockCode"]) == ["000001"]
+
+
+def test_rank_is_market_wide_and_sorts_ascending():
+    snapshotDf = makeSource().fetchSnapshot()
+    resultDf = screenSnapshot(snapshotDf, filters=["changePct>5"], sortBy="volumeRank")
+    assert list(resultDf["stockCode"]) == ["000001", "000002"]
+    assert list(resultDf["volumeRank"]) == [1, 2]
+    topDf = screenSnapshot(snapshotDf, sortBy="volumeRank", topN=2)
+    assert list(topDf["volumeRank"]) == [1, 2]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"filters": ["stockCode>600000"]},
+    {"sortBy": "stockName", "topN": 5},
+    {"filters": ["unknownRank<3"]},
+])
+def test_non_numeric_fields_rejected(kwargs):
+    with pytest.raises(ValueError):
+        screenSnapshot(makeSource().fetchSnapshot(), **kwargs)
+
+
+@pytest.mark.parametrize("sortBy", [None, "volume"])
+def test_non_positive_top_rejected(sortBy):
+    with pytest.raises(ValueError):
+        screenSnapshot(makeSource().fetchSnapshot(), sortBy=sortBy, topN=-1)
@@ -0,0 +1,84 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("requests")
+
+from sharded_fetcher import SharedQuoteColumns, fetchQuotesSharded, splitShards  # noqa: E402
+
+
+def test_split_shards_covers_rows_without_overlap():
+    assert splitShards(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert splitShards(2, 8) == [(0, 1), (1, 2)]
+
+
+def test_shared_columns_round_trip():
+    columns = SharedQuoteColumns.create(3)
+    try:
+        worker = SharedQuoteColumns.attach(columns.name, 3)
+        worker.write(1, {"stockName": "贵州茅台" * 10, "openPrice": 1700.0, "closePrice": 1710.5,
+                         "highPrice": 1720.0, "lowPrice": 1680.0, "volume": 1234500,
+                         "dataSource": "tencent"}, fetchedAt=0.0)
+        worker.close()
+        assert columns.read(0) is None
+        assert columns.read(2) is None
+        quote = columns.read(1)
+        # 名称按字节截断，但不会截出半个汉字
+        assert quote["stockName"] == "贵州茅台" * 4
+        assert quote["closePrice"] == 1710.5
+        assert quote["volume"] == 1234500
+        assert quote["dataSource"] == "tencent"
+    finally:
+        columns.close()
+
+
+def test_invalid_codes_are_reported_not_raised():
+    assert fetchQuotesSharded(["abc", "\ufeff600519"]) == ([], ["abc", "\ufeff600519"])
+
+
+SINA_ROWS = {
+    "sh600519": "贵州茅台,1700.00,1690.00,1710.50,1720.00,1680.00,1710.4,1710.5,12345",
+    "sz000001": "平安银行,10.1,10.0,10.2,10.3,9.9,1,1,5000",
+    "sz300750": "宁德时代,180.0,179.0,181.0,182.0,178.0,1,1,800",
+}
+
+
+def fakeSinaRequest(self, mappedCodes):
+    return "".join(f'var hq_str_{code}="{SINA_ROWS.get(code, "")}";\n' for code in mappedCodes)
+
+
+def failingRequest(self, *args, **kwargs):
+    raise RuntimeError("offline")
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="工作进程需通过 fork 继承测试替身")
+def test_sharded_workers_write_shared_columns(monkeypatch):
+    import multi_source_fetcher as msf
+    from trading_session import TradingCalendar
+
+    monkeypatch.setattr(msf.RobotsChecker, "_getParser", lambda self, url: None)
+    monkeypatch.setattr(msf.SinaSource, "_request", fakeSinaRequest)
+    monkeypatch.setattr(msf.TencentSource, "_request", failingRequest)
+    monkeypatch.setattr(msf.EastMoneySource, "fetchQuote", failingRequest)
+    monkeypatch.setattr(msf.time, "sleep", lambda sec: None)
+    client = msf.MultiSourceClient(includeAkshare=False, calendar=TradingCalendar())
+
+    codes = ["300750", "999999", "600519", "bad", "1"]
+    quotes, failedCodes = fetchQuotesSharded(codes, workers=3, batchSize=2, client=client)
+
+    assert [quote["stockCode"] for quote in quotes] == ["300750", "600519", "000001"]
+    assert [quote["stockName"] for quote in quotes] == ["宁德时代", "贵州茅台", "平安银行"]
+    assert {quote["dataSource"] for quote in quotes} == {"sina"}
+    assert quotes[1]["closePrice"] == 1710.5
+    assert quotes[1]["volume"] == 1234500
+    assert failedCodes == ["bad", "999999"]
+
+
+@pytest.mark.parametrize("kwargs", [{"batchSize": 0}, {"batchSize": -1}, {"workers": 0}])
+def test_invalid_sizes_rejected(kwargs):
+    with pytest.raises(ValueError):
+        fetchQuotesSharded(["600519"], **kwargs)
@@ -0,0 +1,99 @@
+# 本程序由空游开发
+# Copyright (c) 2025 空游
+# SPDX-License-Identifier: MIT
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+
+import trading_session
+from trading_session import CHINA_TZ, TradingCalendar, TradingScheduler
+
+# 2026-10-16 为周五，2026-10-19 为周一
+CALENDAR = TradingCalendar(holidays=[date(2026, 10, 1)])
+
+
+def at(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=CHINA_TZ)
+
+
+@pytest.mark.parametrize("moment, phase", [
+    ("2026-10-16 09:00", "pre_open"),
+    ("2026-10-16 09:20", "auction"),
+    ("2026-10-16 10:00", "morning"),
+    ("2026-10-16 12:00", "lunch"),
+    ("2026-10-16 14:59", "afternoon"),
+    ("2026-10-16 15:00", "post_close"),
+    ("2026-10-17 10:00", "closed_day"),
+    ("2026-10-01 10:00", "closed_day"),
+])
+def test_phase_at(moment, phase):
+    assert CALENDAR.phaseAt(at(moment)) == phase
+
+
+@pytest.mark.parametrize("fetchedAt, validUntil", [
+    ("2026-10-16 10:00", None),
+    ("2026-10-16 15:01", None),  # 收盘宽限期内仍可能变化
+    ("2026-10-16 11:40", "2026-10-16 13:00"),
+    ("2026-10-16 16:00", "2026-10-19 09:15"),
+    ("2026-10-17 10:00", "2026-10-19 09:15"),
+    ("2026-10-16 08:00", "2026-10-16 09:15"),
+    ("2026-09-30 16:00", "2026-10-02 09:15"),
+])
+def test_quote_valid_until(fetchedAt, validUntil):
+    expected = at(validUntil) if validUntil else None
+    assert CALENDAR.quoteValidUntil(at(fetchedAt)) == expected
+
+
+def test_trade_dates_override_weekday_rule():
+    calendar = TradingCalendar(tradeDates=[date(2026, 10, 16), date(2026, 10, 20)])
+    assert not calendar.isTradingDay(date(2026, 10, 19))
+    assert calendar.nextOpen(at("2026-10-16 16:00")) == at("2026-10-20 09:15")
+    # 覆盖范围之外回退到周规则
+    assert calendar.isTradingDay(date(2026, 10, 21))
+
+
+def test_scheduler_pauses_outside_sessions():
+    scheduler = TradingScheduler(CALENDAR, activeIntervalSec=5.0, maxSleepSec=3600.0)
+    assert scheduler.nextDelaySec(at("2026-10-16 10:00")) == 5.0
+    assert scheduler.nextDelaySec(at("2026-10-16 15:01")) == 5.0
+    assert scheduler.nextDelaySec(at("2026-10-16 09:10")) == 300.0
+    assert scheduler.nextDelaySec(at("2026-10-17 10:00")) == 3600.0
+
+
+class StubAkshare:
+    def __init__(self):
+        self.calls = 0
+
+    def tool_trade_date_hist_sina(self):
+        self.calls += 1
+        return {"trade_date": ["2026-10-16", "2026-10-20"]}
+
+
+def test_trade_dates_file_round_trip(tmp_path):
+    path = str(tmp_path / "calendar.json")
+    TradingCalendar(tradeDates=[date(2026, 10, 16), date(2026, 10, 20)]).saveTradeDates(path)
+    calendar = TradingCalendar()
+    assert calendar.loadTradeDates(path)
+    assert not calendar.isTradingDay(date(2026, 10, 19))
+    assert not TradingCalendar().loadTradeDates(str(tmp_path / "missing.json"))
+
+
+def test_default_calendar_never_downloads(monkeypatch):
+    stub = StubAkshare()
+    monkeypatch.setitem(sys.modules, "akshare", stub)
+    monkeypatch.setattr(trading_session, "_defaultCalendar", None)
+    trading_session.getDefaultCalendar()
+    assert stub.calls == 0
+
+
+def test_refresh_downloads_only_when_file_is_stale(monkeypatch):
+    stub = StubAkshare()
+    monkeypatch.setitem(sys.modules, "akshare", stub)
+    monkeypatch.setattr(trading_session, "_defaultCalendar", None)
+    trading_session.refreshDefaultCalendarInBackground().join()
+    assert stub.calls == 1
+    assert os.path.exists(trading_session.defaultCalendarPath())
+    assert trading_session.refreshDefaultCalendarInBackground() is None
+    assert stub.calls == 1
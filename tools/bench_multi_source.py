@@ -26,25 +26,24 @@ ROUND_TRIPS = 3  # 每只股票查询次数
 
 
 def resolve_fetch():
-    """解析可用的多源获取函数，优先使用CLI同源实现。"""
+    """解析多源获取函数：使用单个不带缓存的 MultiSourceClient 测量上游延迟。
+
+    全部样本共用该客户端，熔断状态在样本间保留；旧版本无该接口时回退到模块函数。
+    """
     try:
-        from 股票查询 import fetchQuoteMultiSource
-        return fetchQuoteMultiSource
+        from multi_source_fetcher import MultiSourceClient, normalizeCode
+        client = MultiSourceClient()
+        return lambda code: client.fetchQuote(normalizeCode(code), useCache=False)
     except Exception:
         pass
     try:
-        from multi_source_fetcher import fetchQuoteMultiSource
+        from 股票查询 import fetchQuoteMultiSource
         return fetchQuoteMultiSource
     except Exception:
         pass
     try:
-        from multi_source_fetcher import MultiSourceClient
-        client = MultiSourceClient()
-        for attr in ("fetch", "get", "get_quote", "query"):
-            if hasattr(client, attr):
-                method = getattr(client, attr)
-                return lambda code: method(code)
-        raise AttributeError("MultiSourceClient未找到兼容方法(fetch/get/get_quote/query)")
+        from multi_source_fetcher import fetchQuoteMultiSource
+        return fetchQuoteMultiSource
     except Exception as e:
         raise RuntimeError(f"无法解析多源获取函数: {e}")
 